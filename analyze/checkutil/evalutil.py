@@ -1,36 +1,62 @@
+import mmap
+import os
 import pathlib
 import re
-
-# Regexes
-patt1 = re.compile(r"bin/sbcs\.linux\.x86_64\.gnu\.opt\.spx2 (\d+)")
-patt2 = re.compile(r"Constraint Timings :")
-patt3 = re.compile(r"  (symresack|symretope|orbisack|orbitope)\s+:\s+(\d+(?:\.\d+)?)\+?\s+(\d+(?:\.\d+)?)\+?\s+(\d+(?:\.\d+)?)\+?\s+(\d+(?:\.\d+)?)\+?\s+(\d+(?:\.\d+)?)\+?\s+(\d+(?:\.\d+)?)\+?\s+(\d+(?:\.\d+)?)\+?\s+(\d+(?:\.\d+)?)\+?\s+(\d+(?:\.\d+)?)\+?\s+(\d+(?:\.\d+)?)\+?")
-patt4 = re.compile(r"SCIP Status\s+: ([^\[]+)\[([^\[]+)\]")
-patt5 = re.compile(r"Primal Bound\s+: ([+-]?(\d+([.]\d*)?(e[+-]?\d+)?|[.]\d+(e[+-]?\d+)?))")
-patt6 = re.compile(r"Dual Bound\s+: ([+-]?(\d+([.]\d*)?(e[+-]?\d+)?|[.]\d+(e[+-]?\d+)?))")
-patt7 = re.compile(r"@01\s*([^=\s]*)\s*=+$")
-patt8 = re.compile(r"@03 (\d+)")
-patt9 = re.compile(r"@04 (\d+)")
-patt10 = re.compile(r"Solving Time \(sec\)\s+:\s+(\d+\.?\d+)")
-patt11 = re.compile(r"(?:reading parameter file|reading user parameter file|Reading parameters from) <([^>]*)>(?: ...)?")
-
-
+from dataclasses import dataclass
+from multiprocessing import Pool
+
+# Regexes. The .out-file is scanned as a whole: every line kind of interest is an alternative anchored at a line start.
+# Each alternative starts with its literal prefix, such that the regex engine rejects it on the first character of a
+# line; the matching kind is found by the name of its last capturing group (`lastgroup`). Character classes do not
+# cross newlines, and lines may end in "\n" or "\r\n".
+MASTER = re.compile(
+    rb"^(?:"
+    rb"@01[ \t]*(?P<instance>[^=\s]*)[ \t]*=+\r?$"
+    rb"|@03 (?P<starttime>\d+)"
+    rb"|@04 (?P<endtime>\d+)"
+    rb"|Solving Time \(sec\)[ \t]+:[ \t]+(?P<totaltime>\d+\.?\d+)"
+    rb"|(?:reading parameter file|reading user parameter file|Reading parameters from) <(?P<settings>[^>\n]*)>"
+    rb"|bin/sbcs\.linux\.x86_64\.gnu\.opt\.spx2 (?P<hamilton>\d+)"
+    rb"|Constraint Timings :(?P<timings>)"
+    rb"|  (?:symresack|symretope|orbisack|orbitope)[ \t]+:(?P<ctrrow>(?:[ \t]+\d+(?:\.\d+)?\+?){10})"
+    rb"|SCIP Status[ \t]+: (?P<solved>[^\[\n]+)\[(?P<status>[^\[\n]+)\]"
+    rb"|Primal Bound[ \t]+: (?P<primal>[+-]?(\d+([.]\d*)?(e[+-]?\d+)?|[.]\d+(e[+-]?\d+)?))"
+    rb"|Dual Bound[ \t]+: (?P<dual>[+-]?(\d+([.]\d*)?(e[+-]?\d+)?|[.]\d+(e[+-]?\d+)?))"
+    rb")",
+    re.MULTILINE
+)
+
+@dataclass(slots=True)
 class Instance:
-    def __init__(self, *args) -> None:
-        (self.outpath, self.instancepath, self.settingspath, self.settings, self.instancename, self.totaltime,
-            self.constraint_times, self.solved, self.status, self.primal, self.dual, self.objdir, self.crashed) = args
-
-
-suffixes = [".gz", ".mps", ".cip"]
+    outpath: pathlib.Path
+    instancepath: pathlib.Path
+    settingspath: pathlib.Path
+    settings: str
+    instancename: str
+    totaltime: float
+    constraint_times: dict
+    solved: str
+    status: str
+    primal: float
+    dual: float
+    objdir: object
+
+    @property
+    def crashed(self):
+        return any(getattr(self, field) is None for field in crash_fields)
+
+
+# Fields that stay unset if SCIP did not write its final statistics. The solving time and status are filled in with the
+# time limit when missing, so a crash shows in the bounds.
+crash_fields = ("outpath", "instancepath", "settingspath", "instancename", "totaltime", "solved", "status", "primal",
+    "dual")
+
+
+suffixes = (".gz", ".mps", ".cip")
 def remove_suffices(s):
-    has_suff = True
-    while has_suff:
-        has_suff = False
+    while s.endswith(suffixes):
         for suff in suffixes:
-            if s[-len(suff):] == suff:
-                s = s[:-len(suff)]
-                has_suff = True
-                continue
+            s = s.removesuffix(suff)
     return s
 
 
@@ -49,18 +75,36 @@ def read_outfile(outpath : pathlib.Path):
     starttime = None
     endtime = None
 
-    with open(outpath, "r") as f:
-        for line in f:
-            m = patt7.match(line)
-            if m is not None:
+    # An empty file cannot be memory-mapped.
+    if os.path.getsize(outpath) == 0:
+        return
+
+    with open(outpath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for m in MASTER.finditer(mm):
+            kind = m.lastgroup
+            # Most frequent line kind first.
+            if kind == "ctrrow":
+                if timings_section:
+                    # Columns: constraint, ":", TotalTime, SetupTime, Separate, Propagate, ..., ResProp, SB-Prop.
+                    # A trailing "+" on a time is dropped.
+                    parts = m.group().split()
+                    constraint = parts[0].decode()
+                    if constraint not in timings_times:
+                        ctrtotaltime = float(parts[2].rstrip(b"+"))
+                        proptime = float(parts[5].rstrip(b"+"))
+                        resproptime = float(parts[10].rstrip(b"+"))
+                        timings_times[constraint] = (ctrtotaltime, proptime, resproptime)
+            elif kind == "instance":
                 # Save previous instance
                 if instance is not None:
-                    yield Instance(outpath, instance, settingsfile, settingsfile.stem, instancename, totaltime,
-                        timings_times.copy(), solved, status, primal, dual, objdir)
+                    yield Instance(outpath=outpath, instancepath=instance, settingspath=settingsfile,
+                        settings=settingsfile.stem, instancename=instancename, totaltime=totaltime,
+                        constraint_times=timings_times, solved=solved, status=status, primal=primal, dual=dual,
+                        objdir=objdir)
                     instance = None
                     totaltime = None
                     timings_section = False
-                    timings_times.clear()
+                    timings_times = {}
                     solved = None
                     status = None
                     primal = None
@@ -69,56 +113,32 @@ def read_outfile(outpath : pathlib.Path):
                     starttime = None
                     endtime = None
 
-                instance = pathlib.Path(m.group(1))
+                instance = pathlib.Path(os.fsdecode(m.group("instance")))
                 instancename = remove_suffices(instance.name)
 
                 totaltime = None
-            m = patt8.match(line)
-            if m is not None:
-                starttime = int(m.group(1))
-            m = patt9.match(line)
-            if m is not None:
-                endtime = int(m.group(1))
-
-            m = patt10.match(line)
-            if m is not None:
-                totaltime = float(m.group(1))
-            m = patt11.match(line)
-            if m is not None:
-                settingsfile = pathlib.Path(m.group(1))
-
-            # Hamilton situation!
-            if instance == pathlib.Path(""):
-                m = patt1.match(line)
-                if m is not None:
-                    instance = pathlib.Path(f"hamilton{m.group(1)}")
-                    instancename = m.group(1)
-
-            m = patt2.match(line)
-            if m is not None:
+            elif kind == "starttime":
+                starttime = int(m.group("starttime"))
+            elif kind == "endtime":
+                endtime = int(m.group("endtime"))
+            elif kind == "totaltime":
+                totaltime = float(m.group("totaltime"))
+            elif kind == "settings":
+                settingsfile = pathlib.Path(os.fsdecode(m.group("settings")))
+            elif kind == "hamilton":
+                # Hamilton situation!
+                if instance == pathlib.Path(""):
+                    instancename = m.group("hamilton").decode()
+                    instance = pathlib.Path(f"hamilton{instancename}")
+            elif kind == "timings":
                 timings_section = True
-            if timings_section:
-                m = patt3.match(line)
-                if m is not None:
-                    constraint = m.group(1)
-                    if constraint not in timings_times:
-                        # print(line)
-                        ctrtotaltime = float(m.group(2))
-                        proptime = float(m.group(5))
-                        resproptime = float(m.group(10))
-                        timings_times[constraint] = (ctrtotaltime, proptime, resproptime)
-                        # print(constraint, ctrtotaltime, proptime, resproptime)
-
-            m = patt4.match(line)
-            if m is not None:
-                solved = m.group(1).strip()
-                status = m.group(2)
-            m = patt5.match(line)
-            if m is not None:
-                primal = float(m.group(1))
-            m = patt6.match(line)
-            if m is not None:
-                dual = float(m.group(1))
+            elif kind == "status":
+                solved = m.group("solved").decode().strip()
+                status = m.group("status").decode()
+            elif kind == "primal":
+                primal = float(m.group("primal"))
+            elif kind == "dual":
+                dual = float(m.group("dual"))
             # if objdir is None:
             #     # Take the first one, which is the objective direction of the actual problem (not the presolved one)
             #     m = re.match(r"  Objective\s+: (\w+),", line)
@@ -136,7 +156,6 @@ def read_outfile(outpath : pathlib.Path):
                 objdir = None
 
         if instance is not None:
-            crashed = any(i is None for i in [outpath, instance, settingsfile, instancename, totaltime, solved, status, primal, dual])
             if totaltime is None:
                 totaltime = 7200 # Time limit
             if solved is None:
@@ -144,12 +163,14 @@ def read_outfile(outpath : pathlib.Path):
                 solved = "stuck"
                 status = "time limit reached"
 
-            yield Instance(outpath, instance, settingsfile, settingsfile.stem, instancename, totaltime, 
-                timings_times.copy(), solved, status, primal, dual, objdir, crashed)
+            yield Instance(outpath=outpath, instancepath=instance, settingspath=settingsfile,
+                settings=settingsfile.stem, instancename=instancename, totaltime=totaltime,
+                constraint_times=timings_times, solved=solved, status=status, primal=primal, dual=dual,
+                objdir=objdir)
             instance = None
             totaltime = None
             timings_section = False
-            timings_times.clear()
+            timings_times = {}
             solved = None
             status = None
             primal = None
@@ -158,3 +179,12 @@ def read_outfile(outpath : pathlib.Path):
             starttime = None
             endtime = None
 
+
+def _parse_one(outpath):
+    return outpath, list(read_outfile(outpath))
+
+
+def read_outfiles(outpaths, processes=None, chunksize=8):
+    """Parses the .out-files on multiple cores, yielding (outpath, instances) per file in the order of `outpaths`"""
+    with Pool(processes) as p:
+        yield from p.imap(_parse_one, outpaths, chunksize=chunksize)
@@ -1,73 +1,12 @@
-from checkutil.evalutil import Instance, read_outfile
+from checkutil.evalutil import Instance, read_outfiles
+from dataclasses import fields
+from operator import attrgetter
 import pathlib
 import pandas as pd
 import numpy as np
 import re
 import itertools
 
-datas = []
-
-# For each file of final_miplib_symretope:
-instancenamepatt = re.compile(r"flowersnark(\d+)_3")
-for outfile in itertools.chain(
-    pathlib.Path("results_flowersnark/").glob("*final_flowersnark*.out"),
-    pathlib.Path("results_isopr_nosubtree/").glob("*final_flowersnark*.out")
-):
-    print(outfile)
-
-    instance: Instance
-    for instance in read_outfile(outfile):
-        n = int(instancenamepatt.match(instance.instancename).group(1))
-
-        datas.append([n, instance.instancename, instance.settings, instance.totaltime,
-            instance.solved == "problem is solved", instance.status])
-
-df = pd.DataFrame(datas, columns=["n", "name", "sett", "time", "solved", "status"])
-
-
-# Get all possible settings and names
-setts = df["sett"].unique()
-names = df["name"].unique()
-
-num_settings_per_instance = df.groupby(["name", "sett"])["time"].count().max()
-print(f"{num_settings_per_instance} runs per setting.")
-
-print("# All settings")
-print(setts)
-
-# list incomplete instances (missing for a setting)
-print()
-print("# Testing instances whether they are all solved")
-failed_instances = set()
-for name, gdf in df.groupby("name"):
-    failed = False 
-
-    # Failing checks
-    if gdf["time"].isna().any():
-        print(f"Instance {name} has no solving time")
-        failed = True
-    if gdf["sett"].unique().shape != setts.shape:
-        failed = True
-        print(f"Instance {name} misses settings")
-    if gdf.groupby("sett")["time"].count().min() < num_settings_per_instance:
-        failed = True
-        print(f"Instance {name} has less runs per setting than {num_settings_per_instance}")
-
-    if failed:
-        failed_instances.add(name)
-        # print(gdf)
-        print()
-
-# restrict df to the non-failed instances.
-df = df[df.apply(lambda s: s["name"] not in failed_instances, axis=1)].copy()
-
-# Prepare for geometric means
-df["logtimeplus10"] = np.log(df["time"] + 10)
-
-with open("results_revision_flowersnark.csv", "w") as f:
-    df.to_csv(f)
-df_complete = df
-
 topmatter = r"""% generated by gentable_miplib.py
 \begin{tabular}{l*{7}{rr}}
 \toprule
@@ -213,40 +152,107 @@ def gen_table_flowersnark(df):
 
     print(botmatter)
 
-# Generate table for all instances.
-print("# All instances")
-df = df_complete
-gen_table_flowersnark(df)
 
-# Restricted to instances that cannot be solved by nosym.
-df = df_complete
-max_n_nosym_solved = df[(df["sett"] == "settings_final_nosym") & (df["solved"])]["n"].max()
-print(f"# Restricted to instances for n > {max_n_nosym_solved}")
-df = df[df["n"] > max_n_nosym_solved].copy()
-gen_table_flowersnark(df)
+if __name__ == "__main__":
+    all_instances = []
 
-print("# Restricted to instances that need at least 10s to solve")
-df = df_complete
-sel = df.groupby("name")["time"].min() > 10
-print(f"  {sel.sum()} instances.")
-gen_table_flowersnark(df.set_index("name")[sel].reset_index())
+    # For each file of final_miplib_symretope:
+    instancenamepatt = re.compile(r"^flowersnark(\d+)_3")
+    outfiles = itertools.chain(
+        pathlib.Path("results_flowersnark/").glob("*final_flowersnark*.out"),
+        pathlib.Path("results_isopr_nosubtree/").glob("*final_flowersnark*.out")
+    )
+    for outfile, instances in read_outfiles(outfiles):
+        print(outfile)
+        all_instances.extend(instances)
 
-print("# Restricted to instances that need at least 100s to solve")
-df = df_complete
-sel = df.groupby("name")["time"].min() > 100
-print(f"  {sel.sum()} instances.")
-gen_table_flowersnark(df.set_index("name")[sel].reset_index())
+    # One column per Instance field, read without copying; derived columns are computed column-wise.
+    columns = [field.name for field in fields(Instance)]
+    df = pd.DataFrame(list(map(attrgetter(*columns), all_instances)), columns=columns)
+    df = df.rename(columns={"instancename": "name", "settings": "sett", "totaltime": "time"})
+    df["n"] = df["name"].str.extract(instancenamepatt, expand=False).astype(int)
+    df["time"] = df["time"].astype("float64")
+    df["solved"] = df["solved"] == "problem is solved"
+    df = df[["n", "name", "sett", "time", "solved", "status"]]
 
-breakpoint()
 
-# # Possibly: Restrict to instances that are solved within 10 seconds
-# fast_instances = set(df[df["time"] < 100.0]["name"].unique())
-# df = df[df.apply(lambda s: s["name"] not in fast_instances, axis=1)].copy()
+    # Get all possible settings and names
+    setts = df["sett"].unique()
+    names = df["name"].unique()
 
-# # Possibly: Restrict to instances that are actually solved
-# solved_instances = set(df[df["solved"]]["name"].unique())
-# df = df[df.apply(lambda s: s["name"] in solved_instances, axis=1)].copy()
+    num_settings_per_instance = df.groupby(["name", "sett"])["time"].count().max()
+    print(f"{num_settings_per_instance} runs per setting.")
 
+    print("# All settings")
+    print(setts)
+
+    # list incomplete instances (missing for a setting)
+    print()
+    print("# Testing instances whether they are all solved")
+    failed_instances = set()
+    for name, gdf in df.groupby("name"):
+        failed = False 
+
+        # Failing checks
+        if gdf["time"].isna().any():
+            print(f"Instance {name} has no solving time")
+            failed = True
+        if gdf["sett"].unique().shape != setts.shape:
+            failed = True
+            print(f"Instance {name} misses settings")
+        if gdf.groupby("sett")["time"].count().min() < num_settings_per_instance:
+            failed = True
+            print(f"Instance {name} has less runs per setting than {num_settings_per_instance}")
+
+        if failed:
+            failed_instances.add(name)
+            # print(gdf)
+            print()
+
+    # restrict df to the non-failed instances.
+    df = df[df.apply(lambda s: s["name"] not in failed_instances, axis=1)].copy()
+
+    # Prepare for geometric means
+    df["logtimeplus10"] = np.log(df["time"] + 10)
+
+    with open("results_revision_flowersnark.csv", "w") as f:
+        df.to_csv(f)
+    df_complete = df
+
+    # Generate table for all instances.
+    print("# All instances")
+    df = df_complete
+    gen_table_flowersnark(df)
+
+    # Restricted to instances that cannot be solved by nosym.
+    df = df_complete
+    max_n_nosym_solved = df[(df["sett"] == "settings_final_nosym") & (df["solved"])]["n"].max()
+    print(f"# Restricted to instances for n > {max_n_nosym_solved}")
+    df = df[df["n"] > max_n_nosym_solved].copy()
+    gen_table_flowersnark(df)
+
+    print("# Restricted to instances that need at least 10s to solve")
+    df = df_complete
+    sel = df.groupby("name")["time"].min() > 10
+    print(f"  {sel.sum()} instances.")
+    gen_table_flowersnark(df.set_index("name")[sel].reset_index())
+
+    print("# Restricted to instances that need at least 100s to solve")
+    df = df_complete
+    sel = df.groupby("name")["time"].min() > 100
+    print(f"  {sel.sum()} instances.")
+    gen_table_flowersnark(df.set_index("name")[sel].reset_index())
+
+    breakpoint()
+
+    # # Possibly: Restrict to instances that are solved within 10 seconds
+    # fast_instances = set(df[df["time"] < 100.0]["name"].unique())
+    # df = df[df.apply(lambda s: s["name"] not in fast_instances, axis=1)].copy()
+
+    # # Possibly: Restrict to instances that are actually solved
+    # solved_instances = set(df[df["solved"]]["name"].unique())
+    # df = df[df.apply(lambda s: s["name"] in solved_instances, axis=1)].copy()
 
 
-print()
\ No newline at end of file
+
+    print()
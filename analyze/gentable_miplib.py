@@ -1,4 +1,6 @@
-from checkutil.evalutil import Instance, read_outfile
+from checkutil.evalutil import Instance, crash_fields, read_outfiles
+from dataclasses import fields
+from operator import attrgetter
 import pathlib
 import pandas as pd
 import numpy as np
@@ -6,79 +8,6 @@ import re
 import itertools
 import pickle
 
-datas = []
-
-all_instances = []
-
-# For each file of final_miplib_symretope:
-instancenamepatt = re.compile(r"flowersnark(\d+)_3")
-for outfile in itertools.chain(
-    pathlib.Path("results_miplib/").glob("*final_miplib_symretope*.out"), # No restarts for nosym+weak
-    pathlib.Path("results_isopr_nosubtree/").glob("*final_miplib_symretope*.out") # Nosubtree
-):
-    print(outfile)
-
-    instance: Instance
-    for instance in read_outfile(outfile):
-        # Skip supportcase29 since it crashes in the group-setting.
-        if str.find(instance.instancename, "supportcase29") >= 0:
-            print("Found supportcase29. Skipping because it crashed.")
-            continue
-
-        datas.append([instance.instancename, instance.settings, instance.totaltime, 
-            instance.solved == "problem is solved", instance.status, instance.crashed])
-
-        all_instances.append(instance)
-
-with open("generate_miplib.pickle", "wb") as f:
-    pickle.dump(all_instances, f)
-
-df = pd.DataFrame(datas, columns=["name", "sett", "time", "solved", "status", "crashed"])
-
-
-# Get all possible settings and names
-setts = df["sett"].unique()
-names = df["name"].unique()
-
-num_settings_per_instance = df.groupby(["name", "sett"])["time"].count().max()
-print(f"{num_settings_per_instance} runs per setting.")
-
-print("# All settings")
-print(setts)
-
-# list incomplete instances (missing for a setting)
-print()
-print("# Testing instances whether they are all solved")
-failed_instances = set()
-for name, gdf in df.groupby("name"):
-    failed = False 
-
-    # Failing checks
-    if gdf["time"].isna().any():
-        print(f"Instance {name} has no solving time")
-        failed = True
-    if gdf["sett"].unique().shape != setts.shape:
-        failed = True
-        print(f"Instance {name} misses settings")
-    if gdf.groupby("sett")["time"].count().min() < num_settings_per_instance:
-        failed = True
-        print(f"Instance {name} has less runs per setting than {num_settings_per_instance}")
-
-    if failed:
-        failed_instances.add(name)
-        # print(gdf)
-        print()
-
-# restrict df to the non-failed instances.
-df = df[df.apply(lambda s: s["name"] not in failed_instances, axis=1)].copy()
-
-# Prepare for geometric means
-df["logtimeplus10"] = np.log(df["time"] + 10)
-
-with open("results_revision.csv", "w") as f:
-    df.to_csv(f)
-df_complete = df
-
 topmatter = r"""% generated by gentable_miplib.py
 \begin{tabular}{l*{7}{rr}}
 \toprule
@@ -222,52 +151,130 @@ def gen_table_miplib(df):
 
     print(botmatter)
 
-# Generate table for all instances.
-print("# All instances")
-df = df_complete
-gen_table_miplib(df)
 
-print("# Restricted to instances that need at least 10s to solve")
-df = df_complete
-sel = df.groupby("name")["time"].min() > 10
-print(f"  {sel.sum()} instances.")
-gen_table_miplib(df.set_index("name")[sel].reset_index())
+if __name__ == "__main__":
+    all_instances = []
 
-print("# Restricted to instances that need at least 100s to solve")
-df = df_complete
-sel = df.groupby("name")["time"].min() > 100
-print(f"  {sel.sum()} instances.")
-gen_table_miplib(df.set_index("name")[sel].reset_index())
+    # For each file of final_miplib_symretope:
+    instancenamepatt = re.compile(r"flowersnark(\d+)_3")
+    outfiles = itertools.chain(
+        pathlib.Path("results_miplib/").glob("*final_miplib_symretope*.out"), # No restarts for nosym+weak
+        pathlib.Path("results_isopr_nosubtree/").glob("*final_miplib_symretope*.out") # Nosubtree
+    )
+    for outfile, instances in read_outfiles(outfiles):
+        print(outfile)
 
+        instance: Instance
+        for instance in instances:
+            # Skip supportcase29 since it crashes in the group-setting.
+            if str.find(instance.instancename, "supportcase29") >= 0:
+                print("Found supportcase29. Skipping because it crashed.")
+                continue
 
-print("Restricted to solvable instances")
-df = df_complete
-solvable = df.groupby("name")["solved"].any()
-df_solvable = df.set_index("name")[solvable].reset_index().copy()
+            all_instances.append(instance)
 
-print("# All instances (solvable)")
-df = df_solvable
-gen_table_miplib(df)
+    with open("generate_miplib.pickle", "wb") as f:
+        pickle.dump(all_instances, f)
 
-print("# Restricted to instances that need at least 10s to solve (solvable)")
-df = df_solvable
-sel = df.groupby("name")["time"].min() > 10
-print(f"  {sel.sum()} instances.")
-gen_table_miplib(df.set_index("name")[sel].reset_index())
+    # One column per Instance field, read without copying; derived columns are computed column-wise.
+    columns = [field.name for field in fields(Instance)]
+    df = pd.DataFrame(list(map(attrgetter(*columns), all_instances)), columns=columns)
+    df["crashed"] = df[list(crash_fields)].isna().any(axis=1)
+    df = df.rename(columns={"instancename": "name", "settings": "sett", "totaltime": "time"})
+    df["time"] = df["time"].astype("float64")
+    df["solved"] = df["solved"] == "problem is solved"
+    df = df[["name", "sett", "time", "solved", "status", "crashed"]]
 
-print("# Restricted to instances that need at least 100s to solve (solvable)")
-df = df_solvable
-sel = df.groupby("name")["time"].min() > 100
-print(f"  {sel.sum()} instances.")
-gen_table_miplib(df.set_index("name")[sel].reset_index())
 
+    # Get all possible settings and names
+    setts = df["sett"].unique()
+    names = df["name"].unique()
 
-# # Possibly: Restrict to instances that are solved within 10 seconds
-# fast_instances = set(df[df["time"] < 100.0]["name"].unique())
-# df = df[df.apply(lambda s: s["name"] not in fast_instances, axis=1)].copy()
+    num_settings_per_instance = df.groupby(["name", "sett"])["time"].count().max()
+    print(f"{num_settings_per_instance} runs per setting.")
 
-# # Possibly: Restrict to instances that are actually solved
-# solved_instances = set(df[df["solved"]]["name"].unique())
-# df = df[df.apply(lambda s: s["name"] in solved_instances, axis=1)].copy()
+    print("# All settings")
+    print(setts)
 
-print()
\ No newline at end of file
+    # list incomplete instances (missing for a setting)
+    print()
+    print("# Testing instances whether they are all solved")
+    failed_instances = set()
+    for name, gdf in df.groupby("name"):
+        failed = False 
+
+        # Failing checks
+        if gdf["time"].isna().any():
+            print(f"Instance {name} has no solving time")
+            failed = True
+        if gdf["sett"].unique().shape != setts.shape:
+            failed = True
+            print(f"Instance {name} misses settings")
+        if gdf.groupby("sett")["time"].count().min() < num_settings_per_instance:
+            failed = True
+            print(f"Instance {name} has less runs per setting than {num_settings_per_instance}")
+
+        if failed:
+            failed_instances.add(name)
+            # print(gdf)
+            print()
+
+    # restrict df to the non-failed instances.
+    df = df[df.apply(lambda s: s["name"] not in failed_instances, axis=1)].copy()
+
+    # Prepare for geometric means
+    df["logtimeplus10"] = np.log(df["time"] + 10)
+
+    with open("results_revision.csv", "w") as f:
+        df.to_csv(f)
+    df_complete = df
+
+    # Generate table for all instances.
+    print("# All instances")
+    df = df_complete
+    gen_table_miplib(df)
+
+    print("# Restricted to instances that need at least 10s to solve")
+    df = df_complete
+    sel = df.groupby("name")["time"].min() > 10
+    print(f"  {sel.sum()} instances.")
+    gen_table_miplib(df.set_index("name")[sel].reset_index())
+
+    print("# Restricted to instances that need at least 100s to solve")
+    df = df_complete
+    sel = df.groupby("name")["time"].min() > 100
+    print(f"  {sel.sum()} instances.")
+    gen_table_miplib(df.set_index("name")[sel].reset_index())
+
+
+    print("Restricted to solvable instances")
+    df = df_complete
+    solvable = df.groupby("name")["solved"].any()
+    df_solvable = df.set_index("name")[solvable].reset_index().copy()
+
+    print("# All instances (solvable)")
+    df = df_solvable
+    gen_table_miplib(df)
+
+    print("# Restricted to instances that need at least 10s to solve (solvable)")
+    df = df_solvable
+    sel = df.groupby("name")["time"].min() > 10
+    print(f"  {sel.sum()} instances.")
+    gen_table_miplib(df.set_index("name")[sel].reset_index())
+
+    print("# Restricted to instances that need at least 100s to solve (solvable)")
+    df = df_solvable
+    sel = df.groupby("name")["time"].min() > 100
+    print(f"  {sel.sum()} instances.")
+    gen_table_miplib(df.set_index("name")[sel].reset_index())
+
+
+    # # Possibly: Restrict to instances that are solved within 10 seconds
+    # fast_instances = set(df[df["time"] < 100.0]["name"].unique())
+    # df = df[df.apply(lambda s: s["name"] not in fast_instances, axis=1)].copy()
+
+    # # Possibly: Restrict to instances that are actually solved
+    # solved_instances = set(df[df["solved"]]["name"].unique())
+    # df = df[df.apply(lambda s: s["name"] in solved_instances, axis=1)].copy()
+
+    print()
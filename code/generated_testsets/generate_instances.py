@@ -1,8 +1,10 @@
+import os
 import sys
 import time
 import networkx as nx
 import pyscipopt as ps
 import pathlib
+import shutil
 import glob
 from generatorutils import *
 from multiprocessing import Pool
@@ -10,31 +12,47 @@ import threading
 from itertools import chain, combinations, product
 import math
 
+
+def _silence():
+    sys.stdout = open(os.devnull, "w")  # No output from subprocesses.
+
+
+def _run(job):
+    name, func, args = job
+    return name, func(*args)
+
+
+# Flower snark instances.
+# Generated models are kept per (n, c), such that re-runs only copy them.
+_CACHE = pathlib.Path('instances/flowersnark/.cache')
+
+
+def generate_flowersnark_edge3colouring(n):
+    ts = time.time()
+    c = 3
+    outputpath = f"instances/flowersnark/flowersnark{n}_{c}.cip"
+    if not pathlib.Path(outputpath).exists():
+        cached = _CACHE / f"fs_{n}_{c}.cip"
+        if not cached.exists():
+            # Write to a temporary file first, such that an interrupted run leaves no partial file in the cache.
+            tmppath = cached.with_suffix(".tmp")
+            g = generate_flower_snark(n)
+            make_edge_colouring(g, c, tmppath, backend="text")
+            os.replace(tmppath, cached)
+        shutil.copyfile(cached, outputpath)
+    return time.time() - ts
+
+
 if __name__ == "__main__":
     funcs = []
 
     # Flower snark instances.
     pathlib.Path('instances/flowersnark/').mkdir(parents=True, exist_ok=True)
-    def generate_flowersnark_edge3colouring(n):
-        sys.stdout = None  # No output from subprocesses.
-        ts = time.time()
-        c = 3
-        outputpath = f"instances/flowersnark/flowersnark{n}_{c}.cip"
-        if not pathlib.Path(outputpath).exists():
-            g = generate_flower_snark(n)
-            make_edge_colouring(g, c, outputpath)
-        return time.time() - ts
-
+    _CACHE.mkdir(parents=True, exist_ok=True)
     for n in range(3, 50, 2):
         funcs.append((f"Flower snark edge 3-colouring; {n:3d}", generate_flowersnark_edge3colouring, (n,)))
 
-    # Run everything on multiple cores
-    with Pool(12) as p:
-        awaits = []
-        for name, func, args in funcs:
-            awaits.append((name, p.apply_async(func, args)))
-
-        for name, p in awaits:
-            p.wait()
-            t = p.get()
+    # Run everything on multiple cores, reporting each job as soon as it finishes.
+    with Pool(12, initializer=_silence) as p:
+        for name, t in p.imap_unordered(_run, funcs, chunksize=1):
             print(f"({t:8.3f}s) {name}")
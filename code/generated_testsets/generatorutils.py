@@ -1,7 +1,16 @@
+import io
 import networkx as nx
 import pyscipopt as ps
 import pathlib
+import re
 from itertools import product, combinations, permutations
+from math import gcd
+
+
+# Line kinds of the .col-format. Any non-blank line that is not a comment, problem or complete edge line is unknown.
+_COL_PROBLEM = re.compile(rb"^p.*$", re.MULTILINE)
+_COL_EDGE = re.compile(rb"^e[ \t]+(\d+)[ \t]+(\d+)[ \t\r]*$", re.MULTILINE)
+_COL_UNKNOWN = re.compile(rb"^(?![cp]|e[ \t]+\d+[ \t]+\d+[ \t\r]*$)[ \t\r\f\v]*\S.*$", re.MULTILINE)
 
 
 def get_graph(path, output=False):
@@ -10,29 +19,25 @@ def get_graph(path, output=False):
     nedges = -1
     g : nx.Graph = nx.Graph()
 
-    with open(path, "r") as f:
-        for line in f:
-            if line.strip() == "":
-                continue
-            if line[0] == "c":
-                # Comment line
-                continue
-            if line[0] == "p":
-                linesl = line.strip().split()
-                assert(linesl[1] in ["edge", "edges"])
-                nnodes = int(linesl[2])
-                nedges = int(linesl[3])
-                continue
-            if line[0] == "e":
-                linesl = line.strip().split()
-                i = int(linesl[1])
-                j = int(linesl[2])
-                g.add_edge(i, j)
-                continue
-            linesl = line.rstrip("\n").split()
-            if output:
-                print(linesl)
-            raise Exception("Unknown line type", line.strip())
+    with open(path, "rb") as f:
+        data = f.read()
+
+    m = _COL_UNKNOWN.search(data)
+    if m is not None:
+        line = m.group().decode()
+        linesl = line.split()
+        if output:
+            print(linesl)
+        raise Exception("Unknown line type", line.strip())
+
+    for m in _COL_PROBLEM.finditer(data):
+        linesl = m.group().decode().split()
+        assert(linesl[1] in ["edge", "edges"])
+        nnodes = int(linesl[2])
+        nedges = int(linesl[3])
+
+    # All edges are parsed from the buffer at once.
+    g.add_edges_from((int(i), int(j)) for i, j in _COL_EDGE.findall(data))
 
     if output:
         if len(g.nodes) != nnodes:
@@ -55,27 +60,16 @@ def generate_flower_snark(n, return_nodesets=False):
     g.add_nodes_from(nodes)
 
     # Build n copies of the star graph on 4 vertices, with center A, and surrounding edges B, C, D.
-    for i in range(n):
-        g.add_edges_from([
-            (A[i], B[i]),
-            (A[i], C[i]),
-            (A[i], D[i])
-        ])
+    edges = [(A[i], X[i]) for i in range(n) for X in (B, C, D)]
 
     # Construct the n-cycle on the nodes (B1,...,Bn).
-    g.add_edges_from([
-        (B[i - 1], B[i])
-        for i in range(n)
-    ])
+    edges += [(B[i - 1], B[i]) for i in range(n)]
 
     # Construct the 2n cycle (C1,...,Cn,D1,...,Dn).
-    for i in range(n):
-        if i == 0:
-            g.add_edge(D[-1], C[0])
-            g.add_edge(C[-1], D[0])
-        else:
-            g.add_edge(C[i - 1], C[i])
-            g.add_edge(D[i - 1], D[i])
+    edges += [(D[-1], C[0]), (C[-1], D[0])]
+    edges += [(X[i - 1], X[i]) for i in range(1, n) for X in (C, D)]
+
+    g.add_edges_from(edges)
 
     if return_nodesets:
         return g, (A, B, C, D)
@@ -83,55 +77,122 @@ def generate_flower_snark(n, return_nodesets=False):
         return g
 
 
-# Utility stuff
-def gcd(x, y):
-
-    if x > y:
-        small = y
-    else:
-        small = x
-    for i in range(1, small+1):
-        if((x % i == 0) and (y % i == 0)):
-            gcd = i
-
-    return gcd
-
-
 def get_generator_cycle_notation(gen):
-    s = ""
-    seen = set()
-    for i in range(len(gen)):
-        if i in seen:
+    n = len(gen)
+    seen = bytearray(n)
+    parts = []
+    for i in range(n):
+        if seen[i]:
             continue
-        s += "("
-        j = i
-        s += str(i)
+        seen[i] = 1
+        cycle = [str(i)]
         j = gen[i]
         while j != i:
-            s += ", "
-            s += str(j)
+            seen[j] = 1
+            cycle.append(str(j))
             j = gen[j]
-        s += ")"
-    return s
+        parts.append("(" + ", ".join(cycle) + ")")
+    return "".join(parts)
+
+
+def _format_linear_sum(varnames, keys):
+    """Formats the sum of the variables of `keys` as SCIP writes linear constraints"""
+    coefs = {}
+    for key in keys:
+        coefs[key] = coefs.get(key, 0) + 1
+    if not coefs:
+        return "0"
+
+    terms = []
+    for v, (key, coef) in enumerate(coefs.items()):
+        if coef != 1:
+            terms.append(f" {coef:+.15g}<{varnames[key]}>[B]")
+        elif v > 0:
+            terms.append(f" +<{varnames[key]}>[B]")
+        else:
+            terms.append(f"<{varnames[key]}>[B]")
+    return "".join(terms)
+
+
+def _write_cip(outputpath, varnames, conss, objective=None, sense="minimize"):
+    """Writes a binary program with unit coefficients in SCIP's .cip-format, without building a SCIP model
+
+    `varnames` maps variable keys to names, `conss` is a list of (keys, "<=" or "==", rhs) and `objective` holds the keys
+    of the variables with objective coefficient 1, if any. Constraints are named c1, c2, ... as PySCIPOpt does, and
+    a constraint without variables is written with left-hand side 0 as SCIP does. Repeated keys in a constraint (e.g. from
+    a self-loop) are merged into one term with their multiplicity as coefficient.
+    """
+    objective = set() if objective is None else set(objective)
+    buf = io.StringIO()
+    buf.write("STATISTICS\n")
+    buf.write("  Problem name     : model\n")
+    buf.write(f"  Variables        : {len(varnames)} ({len(varnames)} binary, 0 integer, 0 implicit integer, 0 continuous)\n")
+    buf.write(f"  Constraints      : 0 initial, {len(conss)} maximal\n")
+    buf.write("OBJECTIVE\n")
+    buf.write(f"  Sense            : {sense}\n")
+    # SCIP omits empty sections.
+    if varnames:
+        buf.write("VARIABLES\n")
+    buf.write("".join(
+        f"  [binary] <{name}>: obj={int(key in objective)}, original bounds=[0,1]\n"
+        for key, name in varnames.items()
+    ))
+    if conss:
+        buf.write("CONSTRAINTS\n")
+    buf.write("".join(
+        f"  [linear] <c{k}>: {_format_linear_sum(varnames, keys)} {conssense} {rhs};\n"
+        for k, (keys, conssense, rhs) in enumerate(conss, start=1)
+    ))
+    buf.write("END\n")
+
+    with open(outputpath, "w") as f:
+        f.write(buf.getvalue())
+
+
+def _make_model(varnames, conss, objective=None, sense="minimize"):
+    """Builds the binary program described as in `_write_cip` as PySCIPOpt model"""
+    model = ps.Model()
+
+    x = {}
+    for key, name in varnames.items():
+        x[key] = model.addVar(name=name, vtype="B")
 
+    for keys, conssense, rhs in conss:
+        expr = ps.quicksum(x[key] for key in keys)
+        if conssense == "<=":
+            model.addCons(expr <= rhs)
+        else:
+            assert conssense == "=="
+            model.addCons(expr == rhs)
 
-def make_stable_set(g, outputpath, maxncons=None, maxnvars=None):
-    model = ps.Model()
+    if objective is not None:
+        model.setObjective(ps.quicksum(x[key] for key in objective), sense=sense)
+
+    return model, x
+
+
+def make_stable_set(g, outputpath, maxncons=None, maxnvars=None, backend="pyscipopt"):
+    assert backend in ["pyscipopt", "text"]
 
     if maxnvars is not None and len(g.nodes) > maxnvars:
         return
     if maxncons is not None and len(g.edges) > maxncons:
         return
 
-    x = {}
+    varnames = {}
     for i in sorted(g.nodes):
         args = str(i).strip(" ()").replace(" ", "")
-        x[i] = model.addVar(name=f"x[{args}]", vtype="B")
+        varnames[i] = f"x[{args}]"
 
+    conss = []
     for (i, j) in sorted(g.edges):
-        model.addCons(x[i] + x[j] <= 1)
+        conss.append(([i, j], "<=", 1))
+
+    if backend == "text":
+        _write_cip(outputpath, varnames, conss, objective=varnames, sense="maximize")
+        return
 
-    model.setObjective(ps.quicksum(x.values()), sense="maximize")
+    model, _ = _make_model(varnames, conss, objective=varnames, sense="maximize")
 
     model.writeProblem(outputpath)
 
@@ -139,8 +200,10 @@ def make_stable_set(g, outputpath, maxncons=None, maxnvars=None):
     del model
 
 
-def make_max_kcolourable_subgraph(g, k, outputpath=None, maxncons=None, maxnvars=None, return_model=False, order=None):
-    model = ps.Model()
+def make_max_kcolourable_subgraph(g, k, outputpath=None, maxncons=None, maxnvars=None, return_model=False, order=None,
+        backend="pyscipopt"):
+    assert backend in ["pyscipopt", "text"]
+    assert backend == "pyscipopt" or (outputpath is not None and not return_model)
 
     if maxnvars is not None and len(g.nodes) * k > maxnvars:
         return
@@ -155,22 +218,26 @@ def make_max_kcolourable_subgraph(g, k, outputpath=None, maxncons=None, maxnvars
 
     colours = range(k)
 
-    x = {}
+    varnames = {}
     # Add the variables for each variable in the suggested order.
     for i in order:
+        args = str(i).strip(" ()").replace(" ", "")
         for c in colours:
-            args = str(i).strip(" ()").replace(" ", "")
-            args = f"{args},{c}"
-            x[i, c] = model.addVar(name=f"x[{args}]", vtype="B")
+            varnames[i, c] = f"x[{args},{c}]"
 
+    conss = []
     for (i, j) in sorted(g.edges):
         for c in colours:
-            model.addCons(x[i, c] + x[j, c] <= 1)
+            conss.append(([(i, c), (j, c)], "<=", 1))
 
     for i in order:
-        model.addCons(ps.quicksum(x[i, c] for c in colours) <= 1)
+        conss.append(([(i, c) for c in colours], "<=", 1))
 
-    model.setObjective(ps.quicksum(x.values()), sense="maximize")
+    if backend == "text":
+        _write_cip(outputpath, varnames, conss, objective=varnames, sense="maximize")
+        return
+
+    model, x = _make_model(varnames, conss, objective=varnames, sense="maximize")
 
     if outputpath is not None:
         model.writeProblem(outputpath)
@@ -182,26 +249,31 @@ def make_max_kcolourable_subgraph(g, k, outputpath=None, maxncons=None, maxnvars
         del model
 
 
-def make_vertex_colouring(g, k, outputpath):
-    model = ps.Model()
+def make_vertex_colouring(g, k, outputpath, backend="pyscipopt"):
+    assert backend in ["pyscipopt", "text"]
 
     colours = range(k)
+    nodes = sorted(g.nodes)
 
-    x = {}
-    for i in sorted(g.nodes):
+    varnames = {}
+    for i in nodes:
+        args = str(i).strip(" ()").replace(" ", "")
         for c in colours:
-            args = str(i).strip(" ()").replace(" ", "")
-            args = f"{args},{c}"
-            x[i, c] = model.addVar(name=f"x[{args}]", vtype="B")
+            varnames[i, c] = f"x[{args},{c}]"
 
+    conss = []
     for (i, j) in sorted(g.edges):
         for c in colours:
-            model.addCons(x[i, c] + x[j, c] <= 1)
+            conss.append(([(i, c), (j, c)], "<=", 1))
 
-    for i in sorted(g.nodes):
-        model.addCons(ps.quicksum(x[i, c] for c in colours) == 1)
+    for i in nodes:
+        conss.append(([(i, c) for c in colours], "==", 1))
+
+    if backend == "text":
+        _write_cip(outputpath, varnames, conss, objective=varnames, sense="maximize")
+        return
 
-    model.setObjective(ps.quicksum(x.values()), sense="maximize")
+    model, _ = _make_model(varnames, conss, objective=varnames, sense="maximize")
 
     model.writeProblem(outputpath)
 
@@ -210,8 +282,10 @@ def make_vertex_colouring(g, k, outputpath):
     return model
 
 
-def make_edge_colouring(g, c, outputpath=None, maxncons=None, maxnvars=None, return_model=False, nodeorder=None, edgeorder=None):
-    model = ps.Model()
+def make_edge_colouring(g, c, outputpath=None, maxncons=None, maxnvars=None, return_model=False, nodeorder=None, edgeorder=None,
+        backend="pyscipopt"):
+    assert backend in ["pyscipopt", "text"]
+    assert backend == "pyscipopt" or (outputpath is not None and not return_model)
 
     if maxnvars is not None and len(g.nodes) * c > maxnvars:
         return
@@ -232,19 +306,37 @@ def make_edge_colouring(g, c, outputpath=None, maxncons=None, maxnvars=None, ret
 
     colours = range(c)
 
-    x = {}
+    # Variables are keyed by the sorted endpoints of their edge, registered for both orientations of the edge.
+    canon = {}
     for i, j in edgeorder:
+        canon[i, j] = canon[j, i] = tuple(sorted((i, j)))
+
+    varnames = {}
+    for i, j in edgeorder:
+        key = canon[i, j]
         argsi = str(i).strip(" ()").replace(" ", "")
         argsj = str(j).strip(" ()").replace(" ", "")
         for c in colours:
-            x[tuple(sorted((i, j))), c] = model.addVar(name=f"x[{argsi},{argsj},{c}]", vtype="B")
+            varnames[key, c] = f"x[{argsi},{argsj},{c}]"
+
+    # The edges incident to each node do not depend on the colour.
+    node_edges = {i: [canon[i, j] for j in g.neighbors(i)] for i in nodeorder}
 
+    conss = []
     for i in nodeorder:
+        edges = node_edges[i]
         for c in colours:
-            model.addCons(ps.quicksum(x[tuple(sorted((i, j))), c] for j in g.neighbors(i)) <= 1 )
+            conss.append(([(e, c) for e in edges], "<=", 1))
 
     for i, j in edgeorder:
-        model.addCons(ps.quicksum(x[tuple(sorted((i, j))), c] for c in colours) == 1 )
+        key = canon[i, j]
+        conss.append(([(key, c) for c in colours], "==", 1))
+
+    if backend == "text":
+        _write_cip(outputpath, varnames, conss)
+        return
+
+    model, x = _make_model(varnames, conss)
 
     # model.setObjective(ps.quicksum(x.values()), sense="maximize")
 